@@ -23,7 +23,7 @@ from abses_sce.rice_farmer import RiceFarmer
 
 from .farmer import Farmer
 from .hunter import Hunter
-from .people import SiteGroup
+from .people import SiteGroup, breed_grid, layer_mask
 
 # 加载项目层面的配置
 with initialize(version_base=None, config_path="../config"):
@@ -42,6 +42,35 @@ class CompetingCell(PatchCell):
         self.elevation: float = np.random.uniform(0, 300)
         self._is_water: bool = np.random.choice([True, False], p=[0.05, 0.95])
 
+    def _invalidate_masks(self) -> None:
+        """地形变化时，清空所在图层缓存的可耕地掩膜"""
+        layer = getattr(self, "layer", None)
+        if layer is not None:
+            layer._is_arable_mask = None
+            layer._is_rice_arable_mask = None
+
+    @property
+    def slope(self) -> float:
+        """坡度"""
+        return self._slope
+
+    @slope.setter
+    def slope(self, value: float) -> None:
+        """设置坡度"""
+        self._slope = value
+        self._invalidate_masks()
+
+    @property
+    def elevation(self) -> float:
+        """海拔高度"""
+        return self._elevation
+
+    @elevation.setter
+    def elevation(self, value: float) -> None:
+        """设置海拔高度"""
+        self._elevation = value
+        self._invalidate_masks()
+
     @raster_attribute
     def farmers(self) -> int:
         """这里的农民有多少（size）"""
@@ -74,6 +103,7 @@ class CompetingCell(PatchCell):
         if not isinstance(value, bool):
             raise TypeError(f"Should be bool, got {type(value)} instead.")
         self._is_water = value
+        self._invalidate_masks()
 
     @raster_attribute
     def is_arable(self) -> bool:
@@ -262,16 +292,17 @@ class Env(BaseNature):
         lam_key = f"lam_{farmer_cls.breed}".lower()
         farmers_num = np.random.poisson(self.params.get(lam_key, 0))
         farmers = self.model.agents.create(farmer_cls, num=farmers_num)
-        arable = self.dem.get_raster("is_arable").reshape(self.dem.shape2d)
-        arable_cells = self.dem.array_cells[arable.astype(bool)]
+        arable = layer_mask(self.dem, "is_arable")
         for farmer in farmers:
             min_size, max_size = farmer.params.new_group_size
             farmer.size = farmer.random.randint(min_size, max_size)
-        # 从可耕地、没有主体的里面选
-        arable_cells = ActorsList(self.model, arable_cells)
-        valid_cells = arable_cells.select(
-            ~arable_cells.trigger("has_agent")
-        ).random.choice(size=farmers_num, replace=False, as_list=True)
+        # 从可耕地、没有主体的里面选：
+        # 直接在主体类型栅格上筛出空的可耕地，免去逐个斑块调用 has_agent
+        empty_arable = arable & (breed_grid(self.dem) == 0)
+        arable_cells = self.dem.array_cells[empty_arable]
+        valid_cells = ActorsList(self.model, arable_cells).random.choice(
+            size=farmers_num, replace=False, as_list=True
+        )
         for farmer, cell in zip(farmers, valid_cells):
             if not cell:
                 raise ValueError(f"arable_cells {cell} is None")
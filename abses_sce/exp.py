@@ -5,17 +5,34 @@
 # GitHub   : https://github.com/SongshGeo
 # Website: https://cv.songshgeo.com/
 
+import multiprocessing
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 
 import hydra
 from hydra.core.hydra_config import HydraConfig
-from omegaconf import DictConfig
+from omegaconf import DictConfig, open_dict
 
 from abses_sce.model import Model
 
 warnings.filterwarnings("ignore", module="abses")
 
 
+def _run_in_worker(cfg: DictConfig, unique_run_id: int, outpath: str) -> None:
+    """在子进程里运行一次模型。
+
+    每次运行互相独立，结果写到各自的 CSV 文件里。
+    子进程里关闭保存绘图（离屏也不可交互），需要的图可以事后从数据再画。
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    with open_dict(cfg):
+        cfg.model.save_plots = False
+    model = Model(parameters=cfg, run_id=unique_run_id, outpath=outpath)
+    model.run_model()
+
+
 class Experiment:
     """一次批量实验"""
 
@@ -33,8 +50,25 @@ class Experiment:
         model = Model(parameters=cfg, run_id=unique_run_id, outpath=outpath)
         model.run_model()
 
-    def batch_run(self, cfg: DictConfig, repeats: int, outpath: str) -> None:
-        """Run the experiment multiple times."""
+    def batch_run(
+        self, cfg: DictConfig, repeats: int, outpath: str, parallel: int = 1
+    ) -> None:
+        """Run the experiment multiple times, optionally in parallel."""
+        if parallel > 1 and repeats > 1:
+            # 各次重复互相独立，交给进程池并行跑；
+            # 用 spawn 避免 fork 带着主进程的 matplotlib 状态
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=parallel, mp_context=context
+            ) as pool:
+                futures = [
+                    pool.submit(_run_in_worker, cfg, repeat_id, outpath)
+                    for repeat_id in range(1, repeats + 1)
+                ]
+                for future in futures:
+                    future.result()  # 把子进程的异常抛回主进程
+            self._n_runs += repeats
+            return
         for repeat_id in range(1, repeats + 1):
             self.run(cfg, unique_run_id=repeat_id, outpath=outpath)
             self._n_runs += 1
@@ -46,9 +80,15 @@ def main(cfg: DictConfig | None = None) -> None:
     hydra_config = HydraConfig.get()
     name = hydra_config.job.name  # 实验的名称
     repeats = cfg.exp.repeats  # 每次运行的重复次数
+    parallel = cfg.exp.get("parallel", 1)  # 并行运行的进程数
     # run_id = 1 if cfg.exp.run_id is None else int(cfg.exp.run_id) + 1
     exp = Experiment(name=name)  # 获取实验名称的实例
-    exp.batch_run(cfg=cfg, repeats=repeats, outpath=hydra_config.runtime.output_dir)
+    exp.batch_run(
+        cfg=cfg,
+        repeats=repeats,
+        outpath=hydra_config.runtime.output_dir,
+        parallel=parallel,
+    )
 
 
 if __name__ == "__main__":
@@ -11,12 +11,13 @@
 
 from __future__ import annotations
 
+import math
 from numbers import Number
 from typing import TYPE_CHECKING, Self, Tuple
 
 import numpy as np
 
-from .people import SiteGroup
+from .people import SiteGroup, layer_mask
 
 if TYPE_CHECKING:
     from abses_sce.hunter import Hunter
@@ -81,7 +82,7 @@ class Farmer(SiteGroup):
         if not capital_area:
             raise ValueError("Capital area is not set in params.")
         max_size = np.pi * self.area**2 / capital_area
-        return np.ceil(max_size)
+        return math.ceil(max_size)
 
     def _convert_to_hunter(self) -> Hunter | Self:
         # 如果人数大于不能转化的阈值，就直接返回自身
@@ -97,8 +98,8 @@ class Farmer(SiteGroup):
         cond1 = self.size >= self.params.convert_threshold.get("to_rice", 0)
         # 概率小于转化概率
         cond2 = self.random.random() < self.params.convert_prob.get("to_rice", 0.0)
-        # 所处地块适宜水稻生存
-        cond3 = self._cell.is_rice_arable
+        # 所处地块适宜水稻生存（查图层缓存的掩膜）
+        cond3 = layer_mask(self._cell.layer, "is_rice_arable")[self._cell.indices]
         return (
             self._cell.convert(self, to="RiceFarmer") if cond1 & cond2 & cond3 else self
         )
@@ -9,26 +9,157 @@
 """
 from __future__ import annotations
 
+import math
+from functools import cached_property, lru_cache
 from numbers import Number
 from typing import TYPE_CHECKING, Self, Tuple
 
 import numpy as np
 from abses import PatchCell
+from numba import njit
 
 from abses_sce.rice_farmer import RiceFarmer
 
-from .people import SiteGroup, search_a_new_place
+from .people import (
+    BREED_CODES,
+    SiteGroup,
+    breed_grid,
+    layer_mask,
+    search_a_new_place,
+)
 
 if TYPE_CHECKING:
     from .farmer import Farmer
 
 
+@lru_cache(maxsize=None)
+def neighbor_offsets(radius: int, moore: bool) -> np.ndarray:
+    """某种邻域设置对应的偏移表，只计算一次后全局共享。
+
+    非摩尔邻域（冯诺依曼邻域）只保留曼哈顿距离以内的格子，
+    不包括中心格子本身。
+    """
+    offsets = [
+        (d_row, d_col)
+        for d_row in range(-radius, radius + 1)
+        for d_col in range(-radius, radius + 1)
+        if (d_row, d_col) != (0, 0)
+        and (moore or abs(d_row) + abs(d_col) <= radius)
+    ]
+    return np.array(offsets, dtype=np.int8)
+
+
+@njit(cache=True)
+def decide_converts(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    rand_farmer: np.ndarray,
+    rand_rice: np.ndarray,
+    p_farmer: float,
+    p_rice: float,
+    arable: np.ndarray,
+    rice_arable: np.ndarray,
+    grid: np.ndarray,
+    offsets: np.ndarray,
+    target_farmer: int,
+    target_rice: int,
+) -> np.ndarray:
+    """一次内核遍历，为所有狩猎采集者算出转化去向。
+
+    对每个主体执行与 `Hunter.convert` 相同的判断：
+    随机数与耕地掩膜先把关，通过了才扫描邻域。
+    返回每个主体的去向：0 不转化，1 转化为农民，2 转化为水稻农民。
+    """
+    n = rows.shape[0]
+    decisions = np.zeros(n, dtype=np.int8)
+    height, width = grid.shape
+    for i in range(n):
+        row, col = rows[i], cols[i]
+        check_farmer = rand_farmer[i] < p_farmer and arable[row, col]
+        check_rice = rand_rice[i] < p_rice and rice_arable[row, col]
+        if not (check_farmer or check_rice):
+            continue
+        has_farmer, has_rice = False, False
+        for j in range(offsets.shape[0]):
+            r, c = row + offsets[j, 0], col + offsets[j, 1]
+            if 0 <= r < height and 0 <= c < width:
+                code = grid[r, c]
+                if code & target_farmer:
+                    has_farmer = True
+                if code & target_rice:
+                    has_rice = True
+                if has_farmer and has_rice:
+                    break
+        if check_farmer and has_farmer:
+            decisions[i] = 1
+        elif check_rice and has_rice:
+            decisions[i] = 2
+    return decisions
+
+
+@njit(cache=True)
+def breeds_in_radius(
+    grid: np.ndarray,
+    row: int,
+    col: int,
+    offsets: np.ndarray,
+    target1: int,
+    target2: int,
+) -> Tuple[bool, bool]:
+    """一次扫描同时检查某个位置周围是否有两种主体。
+
+    两种都找到了就提前退出，返回两个布尔值。
+    """
+    height, width = grid.shape
+    found1, found2 = False, False
+    for i in range(offsets.shape[0]):
+        r, c = row + offsets[i, 0], col + offsets[i, 1]
+        if 0 <= r < height and 0 <= c < width:
+            code = grid[r, c]
+            if code & target1:
+                found1 = True
+            if code & target2:
+                found2 = True
+            if found1 and found2:
+                break
+    return found1, found2
+
+
 class Hunter(SiteGroup):
     """狩猎采集者"""
 
+    # 以下参数在一次运行内不变，首次使用时缓存成浮点数，
+    # 避免每个主体每个时间步都重复解析配置对象的属性链。
+    @cached_property
+    def _p_to_farmer(self) -> float:
+        """转化为农民的概率"""
+        return float(self.params.convert_prob.get("to_farmer", 0.0))
+
+    @cached_property
+    def _p_to_rice(self) -> float:
+        """转化为水稻农民的概率"""
+        return float(self.params.convert_prob.get("to_rice", 0.0))
+
+    @cached_property
+    def _intensified(self) -> float:
+        """与农民竞争时的强化系数"""
+        return float(self.params.intensified_coefficient)
+
+    @cached_property
+    def _loss_rate(self) -> float:
+        """竞争失败者的人口损失系数"""
+        return float(self.model.params.loss_rate)
+
     @property
     def max_size(self) -> int:
-        return np.ceil(self.loc("lim_h")) if self.on_earth else 100_000_000
+        if not self.on_earth:
+            return 100_000_000
+        lim_h = self.loc("lim_h")
+        # 人口上限栅格的无数据像元被读成 NaN（见 `Env._open_rasterio`），
+        # 狩猎采集者站在这些陆地斑块上时视作不限人口
+        if math.isnan(lim_h):
+            return 100_000_000
+        return math.ceil(lim_h)
 
     @property
     def is_complex(self) -> bool:
@@ -49,7 +180,7 @@ class Hunter(SiteGroup):
         if cell is None:
             super().put_on()
             return
-        existing_agent = cell.agents[0] if cell.has_agent() else None
+        existing_agent = getattr(cell, "_occupant", None)
         super().put_on(cell)
         if existing_agent:
             self.compete(existing_agent)
@@ -70,52 +201,14 @@ class Hunter(SiteGroup):
         if self.size >= self.max_size:
             return super().diffuse(group_range=group_range)
 
-    def convert(self, radius: int = 1, moore: bool = False) -> Self:
+    def convert(self, radius: int = 1, moore: bool = False) -> Self | Farmer | RiceFarmer:
         """狩猎采集者向农民转化：
-        1. 优先转化成普通农民
-        2. 其次考虑转化为水稻农民
-        """
-        agent = self._convert_to_farmer(radius=radius, moore=moore)
-        # agent 不是自己说明转化成功
-        if agent is not self:
-            return agent
-        # 没成功再看转化水稻农民的结果
-        return self._convert_to_rice(radius=radius, moore=moore)
-
-    def _convert_to_farmer(self, radius: int = 1, moore: bool = False) -> Self | Farmer:
-        """狩猎采集者可能转化为农民，需要满足以下条件：
-        1. 周围有农民
-        2. 目前的土地是可耕地
-        3. 转化概率小于阈值
+        1. 优先转化成普通农民，需要转化概率通过、土地是可耕地、且周围有农民
+        2. 其次考虑转化为水稻农民，需要转化概率通过、
+        土地满足水稻生长条件、且周围有水稻农民
 
-        Args:
-            radius (int): 搜索的半径范围，默认为周围一格。
-            moore (bool): 是否使用Moore邻域进行搜索，
-            即搜索8临域，包括对角线的四个格子。
-            默认不启用（即仅计算上下左右四个格子）。
-
-        returns:
-            如果没有转化，返回自身。
-            如果成功转化，返回转化后的主体。
-        """
-        # 周围有农民
-        cells = self._cell.get_neighboring_cells(radius=radius, moore=moore)
-        cond1 = any(cells.trigger("has_agent", breed="Farmer"))
-        # 且目前的土地是可耕地
-        cond2 = self._cell.is_arable
-        # 转化概率小于阈值
-        convert_prob = self.params.convert_prob.get("to_farmer", 0.0)
-        cond3 = self.random.random() < convert_prob
-        # 同时满足上述条件，狩猎采集者转化为农民
-        return self._cell.convert(self, "Farmer") if cond1 and cond2 and cond3 else self
-
-    def _convert_to_rice(
-        self, radius: int = 1, moore: bool = False
-    ) -> Self | RiceFarmer:
-        """狩猎采集者可能转化为水稻农民，需要满足以下条件：
-        1. 周围有水稻农民
-        2. 目前的土地是满足水稻生长条件的可耕地
-        3. 转化概率小于阈值
+        先抽随机数并检查耕地条件，都不通过就省掉昂贵的邻域扫描；
+        两种转化检查共享同一次邻域扫描。
 
         Args:
             radius (int): 搜索的半径范围，默认为周围一格。
@@ -127,20 +220,33 @@ class Hunter(SiteGroup):
             如果没有转化，返回自身。
             如果成功转化，返回转化后的主体。
         """
-        # 周围有水稻农民
-        cells = self._cell.get_neighboring_cells(radius=radius, moore=moore)
-        cond1 = any(cells.trigger("has_agent", breed="RiceFarmer"))
-        # 且目前的土地是可耕地
-        cond2 = self._cell.is_rice_arable
-        # 转化概率小于阈值
-        convert_prob = self.params.convert_prob.get("to_rice", 0.0)
-        cond3 = self.random.random() < convert_prob
-        # 同时满足上述条件，狩猎采集者转化为农民
-        return (
-            self._cell.convert(self, "RiceFarmer")
-            if cond1 and cond2 and cond3
-            else self
+        cell = self._cell
+        row, col = cell.indices
+        # 先抽随机数、查耕地掩膜，决定还需要检查哪些邻域
+        check_farmer = (
+            self.random.random() < self._p_to_farmer
+            and layer_mask(cell.layer, "is_arable")[row, col]
+        )
+        check_rice = (
+            self.random.random() < self._p_to_rice
+            and layer_mask(cell.layer, "is_rice_arable")[row, col]
+        )
+        if not (check_farmer or check_rice):
+            return self
+        # 一次扫描同时检查周围有没有农民和水稻农民
+        has_farmer, has_rice = breeds_in_radius(
+            breed_grid(cell.layer),
+            row,
+            col,
+            neighbor_offsets(radius, moore),
+            BREED_CODES["Farmer"],
+            BREED_CODES["RiceFarmer"],
         )
+        if check_farmer and has_farmer:
+            return cell.convert(self, "Farmer")
+        if check_rice and has_rice:
+            return cell.convert(self, "RiceFarmer")
+        return self
 
     def move(self, radius: int = 1) -> None:
         """有移动能力才能移动，在周围随机选取一个格子移动。
@@ -165,7 +271,7 @@ class Hunter(SiteGroup):
 
     def _loss_competition(self, loser: SiteGroup):
         """失败者"""
-        loss = self.model.params.loss_rate
+        loss = self._loss_rate
         if loser.breed in ("Farmer", "RiceFarmer"):
             loser.die()
         elif loser.breed == "Hunter":
@@ -189,7 +295,7 @@ class Hunter(SiteGroup):
 
     def _compete_with_farmer(self, farmer: Farmer) -> bool:
         """与其它农民竞争"""
-        power = self.size * self.params.intensified_coefficient
+        power = self.size * self._intensified
         if power >= farmer.size:
             self._loss_competition(farmer)
             return True
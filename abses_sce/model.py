@@ -5,24 +5,40 @@
 # GitHub   : https://github.com/SongshGeo
 # Website: https://cv.songshgeo.com/
 
+from __future__ import annotations
+
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, List
 
+import numpy as np
 import pandas as pd
 from abses import ActorsList, MainModel
 
+if TYPE_CHECKING:
+    from abses_sce.people import SiteGroup
+
 from abses_sce.farmer import Farmer
+from abses_sce.hunter import decide_converts, neighbor_offsets
+from abses_sce.people import BREED_CODES, breed_grid, layer_mask
 from abses_sce.plot import ModelViz
 from abses_sce.rice_farmer import RiceFarmer
 
 from .env import Env
 
 
+INIT_CAPACITY = 1024  # 每种主体的人口规模数组的初始容量
+
+
 class Model(MainModel):
     """运行的模型"""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, nature_class=Env, **kwargs)
+        # 每种主体一个预分配的人口规模数组（SoA），主体死亡后槽位可被复用
+        self._size_arrays: Dict[str, np.ndarray] = {}
+        self._free_slots: Dict[str, List[int]] = {}
+        # 每种主体的花名册，注册、死亡时维护，按创建顺序排列
+        self._breed_actors: Dict[str, Dict[SiteGroup, None]] = {}
         self.nature.add_hunters()
         self.farmers_num = []
         self.new_farmers = []
@@ -31,6 +47,7 @@ class Model(MainModel):
         self.len_hunters = []
         self.len_rice = []
         self.rice_num = []
+        self._dataset_cache = None
         self.outpath = kwargs.get("outpath", "")
 
     @property
@@ -49,17 +66,119 @@ class Model(MainModel):
     @property
     def farmers(self) -> ActorsList:
         """农民列表"""
-        return self.agents.select("Farmer")
+        return ActorsList(self, self._breed_actors.get("Farmer", ()))
 
     @property
     def hunters(self) -> ActorsList:
         """狩猎采集者列表"""
-        return self.agents.select("Hunter")
+        return ActorsList(self, self._breed_actors.get("Hunter", ()))
 
     @property
     def rice(self) -> ActorsList:
         """种水稻的农民列表"""
-        return self.agents.select("RiceFarmer")
+        return ActorsList(self, self._breed_actors.get("RiceFarmer", ()))
+
+    def _sizes_of(self, breed: str) -> np.ndarray:
+        """某种主体的人口规模数组（未取整，预分配，包含空槽位）"""
+        if breed not in self._size_arrays:
+            self._size_arrays[breed] = np.zeros(INIT_CAPACITY, dtype=np.float32)
+            self._free_slots[breed] = list(reversed(range(INIT_CAPACITY)))
+        return self._size_arrays[breed]
+
+    def register_size(self, actor: SiteGroup) -> int:
+        """登记一个新主体：记入花名册，并分配人口规模数组的槽位"""
+        self._breed_actors.setdefault(actor.breed, {})[actor] = None
+        arr = self._sizes_of(actor.breed)
+        free = self._free_slots[actor.breed]
+        if not free:
+            # 容量不足时翻倍，新增的槽位都是空的
+            capacity = arr.size
+            arr = np.concatenate([arr, np.zeros(capacity, dtype=np.float32)])
+            self._size_arrays[actor.breed] = arr
+            free.extend(reversed(range(capacity, capacity * 2)))
+        slot = free.pop()
+        arr[slot] = 0.0
+        return slot
+
+    def write_size(self, actor: SiteGroup, size: float) -> None:
+        """主体人口变化时，同步写入其槽位"""
+        self._size_arrays[actor.breed][actor.slot] = size
+
+    def drop_size(self, actor: SiteGroup) -> None:
+        """主体死亡时，从花名册注销，清空并回收其槽位"""
+        self._breed_actors[actor.breed].pop(actor, None)
+        self._size_arrays[actor.breed][actor.slot] = 0.0
+        self._free_slots[actor.breed].append(actor.slot)
+
+    def alive_sizes(self, breed: str) -> np.ndarray:
+        """某种主体当前的人口规模（取整，已去掉空槽位）"""
+        arr = self._sizes_of(breed)
+        return np.ceil(arr[arr > 0.0])
+
+    def population_growth(self) -> None:
+        """所有主体的人口增长。
+
+        同种主体的增长率在一次运行内是常量，因此直接对人口规模数组
+        做一次向量化的放大，再逐个检查人口上下限：
+        越界的主体仍走原有的 setter 逻辑（不足下限死亡、超过上限封顶或复杂化）。
+        """
+        for actors in (self.farmers, self.rice, self.hunters):
+            if not actors:
+                continue
+            growth_rate = actors[0].params.growth_rate
+            arr = self._sizes_of(actors[0].breed)
+            arr *= 1.0 + growth_rate
+            for actor in actors:
+                size = float(arr[actor.slot])
+                if not actor.on_earth:
+                    # 不在地图上的主体不增长，恢复其原有人口
+                    arr[actor.slot] = actor._size
+                elif size < actor.min_size:
+                    actor.die()
+                elif size > actor.max_size:
+                    # 走 setter 逻辑：封顶，农民可能触发复杂化
+                    actor.size = size
+                else:
+                    actor._size = size
+
+    def convert_hunters(self, radius: int = 1, moore: bool = False) -> None:
+        """批量处理所有狩猎采集者的转化阶段。
+
+        与逐个调用 `Hunter.convert` 不同，先把位置、随机数和耕地掩膜
+        交给一个 numba 内核，一次遍历算出每个主体的转化去向，
+        再只对要转化的少数主体做对象层面的转化。
+        """
+        hunters = [hunter for hunter in self.hunters if hunter.on_earth]
+        if not hunters:
+            return
+        layer = self.nature.dem
+        n = len(hunters)
+        rows = np.empty(n, dtype=np.int64)
+        cols = np.empty(n, dtype=np.int64)
+        for i, hunter in enumerate(hunters):
+            rows[i], cols[i] = hunter._cell.indices
+        # 与逐个转化时相同，每个主体两个随机数，但一次批量生成
+        rand_farmer = np.random.random(n)
+        rand_rice = np.random.random(n)
+        decisions = decide_converts(
+            rows,
+            cols,
+            rand_farmer,
+            rand_rice,
+            hunters[0]._p_to_farmer,
+            hunters[0]._p_to_rice,
+            layer_mask(layer, "is_arable"),
+            layer_mask(layer, "is_rice_arable"),
+            breed_grid(layer),
+            neighbor_offsets(radius, moore),
+            BREED_CODES["Farmer"],
+            BREED_CODES["RiceFarmer"],
+        )
+        for hunter, decision in zip(hunters, decisions):
+            if decision == 1:
+                hunter._cell.convert(hunter, "Farmer")
+            elif decision == 2:
+                hunter._cell.convert(hunter, "RiceFarmer")
 
     def trigger(self, actors: ActorsList, func: str, *args, **kwargs) -> None:
         """触发所有还活着的主体的行动"""
@@ -76,22 +195,35 @@ class Model(MainModel):
         """
         farmers = self.nature.add_farmers(Farmer)
         farmers = self.nature.add_farmers(RiceFarmer)
-        self.trigger(self.actors, "population_growth")
-        self.trigger(self.actors, "convert")
-        self.trigger(self.actors, "diffuse")
+        # 本步的主体列表只构建一次，各阶段共用；
+        # 阶段中死亡的主体由 trigger 里的 on_earth 检查跳过
+        actors = self.actors
+        self.population_growth()
+        # 狩猎采集者的转化批量决策，农民走各自的 convert 逻辑；
+        # 先快照农民列表，本阶段刚转化出来的新主体不再参与本步转化
+        farmers_now, rice_now = self.farmers, self.rice
+        self.convert_hunters()
+        self.trigger(farmers_now, "convert")
+        self.trigger(rice_now, "convert")
+        self.trigger(actors, "diffuse")
         self.trigger(self.hunters, "move")
         # 更新农民和狩猎采集者数量
         self.new_farmers.append(len(farmers))
-        self.farmers_num.append(self.farmers.array("size").sum())
-        self.hunters_num.append(self.hunters.array("size").sum())
-        self.rice_num.append(self.rice.array("size").sum())
+        self.farmers_num.append(np.ceil(self._sizes_of("Farmer")).sum())
+        self.hunters_num.append(np.ceil(self._sizes_of("Hunter")).sum())
+        self.rice_num.append(np.ceil(self._sizes_of("RiceFarmer")).sum())
         self.len_hunters.append(len(self.hunters))
         self.len_farmers.append(len(self.farmers))
         self.len_rice.append(len(self.rice))
 
     @property
     def dataset(self) -> pd.DataFrame:
-        """数据"""
+        """数据。绘图和导出会在一个时间步里多次读取，
+        因此按当前时间步缓存，有新数据时才重新构建。
+        """
+        tick = self.time.tick
+        if self._dataset_cache is not None and self._dataset_cache[0] == tick:
+            return self._dataset_cache[1]
         data = {
             "new_farmers": self.new_farmers,
             "farmers_num": self.farmers_num,
@@ -101,7 +233,9 @@ class Model(MainModel):
             "len_farmers": self.len_farmers,
             "len_rice": self.len_rice,
         }
-        return pd.DataFrame(data=data, index=range(self.time.tick))
+        dataset = pd.DataFrame(data=data, index=range(tick))
+        self._dataset_cache = (tick, dataset)
+        return dataset
 
     def export_data(self) -> None:
         """导出实验数据"""
@@ -9,29 +9,79 @@
 根据不同具体类别的主体需求，部分功能也会被覆写。
 """
 
+import math
 from numbers import Number
 from typing import Optional, Self, Tuple
 
 import numpy as np
 import pandas as pd
-from abses import Actor
+from abses import Actor, ActorsList
 from abses.nature import PatchCell
 
+# 主体类型在斑块类型栅格里的位标记，0 代表无主体；
+# 一个斑块上短暂出现多种主体时（竞争期间），各自的位都会被置上
+BREED_CODES = {"Farmer": 1 << 0, "RiceFarmer": 1 << 1, "Hunter": 1 << 2}
+
+
+def breed_grid(layer) -> np.ndarray:
+    """图层的主体类型栅格，记录每个斑块上站着哪些主体（位标记）"""
+    grid = getattr(layer, "_breed_grid", None)
+    if grid is None:
+        grid = np.zeros(layer.shape2d, dtype=np.int8)
+        layer._breed_grid = grid
+    return grid
+
+
+def update_breed_grid(cell: PatchCell) -> None:
+    """根据斑块上现有的主体，更新其在主体类型栅格里的位标记，
+    并维护斑块上的直接占据者引用（见 `Hunter.put_on` 的竞争判断）。
+    """
+    agents = cell.agents
+    code = 0
+    for agent in agents:
+        code |= BREED_CODES.get(agent.breed, 0)
+    breed_grid(cell.layer)[cell.indices] = code
+    cell._occupant = agents[0] if agents else None
+
+
+def layer_mask(layer, attr: str) -> np.ndarray:
+    """图层某个布尔属性的缓存栅格。
+
+    地形在一次运行内基本不变，属性逐斑块计算一次后整层缓存；
+    斑块的地形发生变化时，由斑块负责清空缓存（见 `CompetingCell`）。
+    """
+    name = f"_{attr}_mask"
+    mask = getattr(layer, name, None)
+    if mask is None:
+        mask = layer.get_raster(attr).reshape(layer.shape2d).astype(bool)
+        setattr(layer, name, mask)
+    return mask
+
 
 class SiteGroup(Actor):
     """原始的聚落"""
 
     def __init__(self, *arg, **kwargs) -> None:
+        self._slot: Optional[int] = None
         super().__init__(*arg, **kwargs)
         self._min_size = self.params.get("min_size", 0.0)
         self._max_size = self.params.get("max_size", 0.0)
+        # 如果模型维护人口规模数组，就注册一个槽位，人口变化时同步写入
+        register = getattr(self.model, "register_size", None)
+        if register is not None:
+            self._slot = register(self)
         self.size = kwargs.get("size", self.min_size)
         self.source = self.breed
 
+    @property
+    def slot(self) -> Optional[int]:
+        """在模型人口规模数组里的槽位编号"""
+        return self._slot
+
     @property
     def size(self) -> int:
         """人口规模，转化成整数"""
-        return np.ceil(self._size)
+        return math.ceil(self._size)
 
     @size.setter
     def size(self, size: Number) -> None:
@@ -42,11 +92,32 @@ class SiteGroup(Actor):
             return
         size = min(size, self.max_size)
         self._size = size
+        if self._slot is not None:
+            self.model.write_size(self, size)
+
+    def put_on(self, cell: PatchCell | None = None) -> None:
+        """移动时，同步更新新旧斑块的主体类型栅格"""
+        old_cell = self._cell
+        super().put_on(cell)
+        if old_cell is not None:
+            update_breed_grid(old_cell)
+        if cell is not None:
+            update_breed_grid(cell)
+
+    def die(self) -> None:
+        """主体死亡时，回收其在模型人口规模数组里的槽位"""
+        if self._slot is not None:
+            self.model.drop_size(self)
+            self._slot = None
+        cell = self._cell
+        super().die()
+        if cell is not None:
+            update_breed_grid(cell)
 
     @property
     def min_size(self) -> int:
         """最小的人数，转化成整数"""
-        return np.ceil(self._min_size)
+        return math.ceil(self._min_size)
 
     @min_size.setter
     def min_size(self, value: Number) -> None:
@@ -58,7 +129,7 @@ class SiteGroup(Actor):
     @property
     def max_size(self) -> int:
         """最大的人数，转化成整数"""
-        return np.ceil(self._max_size)
+        return math.ceil(self._max_size)
 
     @max_size.setter
     def max_size(self, value: Number) -> None:
@@ -150,11 +221,11 @@ def search_a_new_place(
     cells = cell.get_neighboring_cells(
         radius=radius, moore=False, include_center=False, annular=True
     )
-    # 检查周围的格子是否符合当前主体的停留要求
-    accessibility = [cell.able_to_live(agent) for cell in cells]
+    # 一次遍历直接筛出符合当前主体停留要求的格子
+    accessible = [cell for cell in cells if cell.able_to_live(agent)]
     # 如果有符合要求的格子，随机选择一个符合要求的
-    if any(accessibility):
-        selected_cells = cells.select(accessibility)
+    if accessible:
+        selected_cells = ActorsList(agent.model, accessible)
         prob = [cell.suitable_level(agent) for cell in selected_cells]
         return selected_cells.random.choice(prob=prob)
     if radius < agent.params.max_travel_distance:
@@ -10,6 +10,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import numpy as np
 import seaborn as sns
 from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
@@ -34,9 +35,9 @@ class ModelViz:
     def histplot(self) -> Axes:  # sourcery skip: class-extract-method
         """绘制主体人数的分布直方图"""
         _, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(10, 3))
-        sns.histplot(self.model.farmers.array("size"), ax=ax1)
-        sns.histplot(self.model.hunters.array("size"), ax=ax2)
-        sns.histplot(self.model.rice.array("size"), ax=ax3)
+        sns.histplot(self.model.alive_sizes("Farmer"), ax=ax1)
+        sns.histplot(self.model.alive_sizes("Hunter"), ax=ax2)
+        sns.histplot(self.model.alive_sizes("RiceFarmer"), ax=ax3)
         ax1.set_xlabel("Farmers")
         ax2.set_xlabel("Hunters")
         ax3.set_xlabel("Rice Farmers")
@@ -66,10 +67,15 @@ class ModelViz:
     def heatmap(self) -> Axes:
         """绘制狩猎采集者和农民的空间分布"""
         _, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(10, 3))
-        mask = self.model.nature.dem.get_xarray("elevation") >= 0
-        farmers = self.model.nature.dem.get_xarray("farmers").where(mask)
-        hunters = self.model.nature.dem.get_xarray("hunters").where(mask)
-        rice = self.model.nature.dem.get_xarray("rice_farmers").where(mask)
+        dem = self.model.nature.dem
+        # 掩膜只算一次，直接在底层数组上应用，避免逐图层的 xarray 对齐和拷贝
+        mask = dem.get_xarray("elevation").data >= 0
+        farmers = dem.get_xarray("farmers")
+        hunters = dem.get_xarray("hunters")
+        rice = dem.get_xarray("rice_farmers")
+        farmers = farmers.copy(data=np.where(mask, farmers.data, np.nan))
+        hunters = hunters.copy(data=np.where(mask, hunters.data, np.nan))
+        rice = rice.copy(data=np.where(mask, rice.data, np.nan))
         farmers.plot.contourf(ax=ax1, cmap="Reds")
         hunters.plot.contourf(ax=ax2, cmap="Greens")
         rice.plot.contourf(ax=ax3, cmap="Oranges")
@@ -13,8 +13,8 @@ from abses import MainModel, PatchModule
 
 from abses_sce.env import CompetingCell
 from abses_sce.farmer import Farmer
-from abses_sce.hunter import Hunter
-from abses_sce.people import SiteGroup
+from abses_sce.hunter import Hunter, decide_converts, neighbor_offsets
+from abses_sce.people import BREED_CODES, SiteGroup, breed_grid, layer_mask
 from abses_sce.rice_farmer import RiceFarmer
 
 from .conftest import cfg, set_cell_arable_condition
@@ -176,6 +176,76 @@ class TestHunters:
         assert (isinstance(convert, Hunter)) != changed
         assert convert.size == size
 
+    @pytest.mark.parametrize(
+        "to_farmer, to_rice, random_value, arable, rice_arable, neighbors, expected",
+        [
+            (0.5, 0, 0.4, True, False, [Farmer], 1),
+            (0.5, 0, 0.6, True, False, [Farmer], 0),
+            (0.5, 0, 0.4, False, False, [Farmer], 0),
+            (0.5, 0, 0.4, True, False, [], 0),
+            (0, 0.5, 0.4, True, True, [RiceFarmer], 2),
+            (0, 0.5, 0.4, True, False, [RiceFarmer], 0),
+            (0, 0.5, 0.4, True, True, [Farmer], 0),
+            (0.5, 0.5, 0.4, True, True, [Farmer, RiceFarmer], 1),
+        ],
+        ids=[
+            "to_farmer",
+            "rng_blocks",
+            "not_arable",
+            "no_neighbor",
+            "to_rice",
+            "not_rice_arable",
+            "wrong_neighbor",
+            "farmer_first",
+        ],
+    )
+    def test_decide_converts_matches_convert(
+        self,
+        model,
+        layer,
+        cell,
+        hunter,
+        to_farmer,
+        to_rice,
+        random_value,
+        arable,
+        rice_arable,
+        neighbors,
+        expected,
+    ):
+        """测试批量转化内核与逐个调用 `Hunter.convert` 给出相同的判断"""
+        # Arrange：与上面两个转化测试相同的设置
+        hunter.params.convert_prob.to_farmer = to_farmer
+        hunter.params.convert_prob.to_rice = to_rice
+        hunter.random.random = MagicMock(return_value=random_value)
+        for breed_cls, pos in zip(neighbors, [(2, 2), (3, 1)]):
+            agent = model.agents.create(breed_cls, singleton=True)
+            agent.put_on(layer.array_cells[pos[0]][pos[1]])
+        set_cell_arable_condition(cell, arable=arable, rice_arable=rice_arable)
+
+        # Act：先用内核算出去向，再执行逐个的转化方法
+        row, col = cell.indices
+        decisions = decide_converts(
+            np.array([row]),
+            np.array([col]),
+            np.array([random_value]),
+            np.array([random_value]),
+            hunter._p_to_farmer,
+            hunter._p_to_rice,
+            layer_mask(layer, "is_arable"),
+            layer_mask(layer, "is_rice_arable"),
+            breed_grid(layer),
+            neighbor_offsets(radius=1, moore=False),
+            BREED_CODES["Farmer"],
+            BREED_CODES["RiceFarmer"],
+        )
+        converted = hunter.convert()
+
+        # Assert：两条路径的去向一致
+        assert decisions[0] == expected
+        expected_breed = {0: "Hunter", 1: "Farmer", 2: "RiceFarmer"}[expected]
+        assert converted.breed == expected_breed
+
     @pytest.mark.parametrize(
         "size, expected_move",
         [(20, True), (6, True), (131, False), (160, False)],
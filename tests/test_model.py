@@ -0,0 +1,118 @@
+#!/usr/bin/env python 3.11.0
+# -*-coding:utf-8 -*-
+# @Author  : Shuang (Twist) Song
+# @Contact   : SongshGeo@gmail.com
+# GitHub   : https://github.com/SongshGeo
+# Website: https://cv.songshgeo.com/
+
+"""测试模型层面向量化的人口增长，
+检查它与主体自身 `population_growth` 的边界行为一致。
+"""
+
+import numpy as np
+import pytest
+from abses import MainModel
+
+from abses_sce.env import CompetingCell
+from abses_sce.farmer import Farmer
+from abses_sce.hunter import Hunter
+from abses_sce.model import Model
+
+from .conftest import cfg
+
+
+class SizedModel(MainModel):
+    """带人口规模数组钩子的测试模型，复用 `Model` 的向量化人口增长，
+    但不加载真实的空间数据。
+    """
+
+    farmers = Model.farmers
+    hunters = Model.hunters
+    rice = Model.rice
+    _sizes_of = Model._sizes_of
+    register_size = Model.register_size
+    write_size = Model.write_size
+    drop_size = Model.drop_size
+    alive_sizes = Model.alive_sizes
+    population_growth = Model.population_growth
+
+    def __init__(self, *args, **kwargs):
+        self._size_arrays = {}
+        self._free_slots = {}
+        self._breed_actors = {}
+        super().__init__(*args, **kwargs)
+
+
+class TestPopulationGrowth:
+    """测试向量化的人口增长"""
+
+    @pytest.fixture(name="model")
+    def mock_model(self) -> SizedModel:
+        """创建一个用于测试的模型，拥有一个 4 * 4 的名为'layer'的图层。"""
+        model = SizedModel(parameters=cfg)
+        layer = model.nature.create_module(
+            name="layer",
+            how="from_resolution",
+            shape=(4, 4),
+            cell_cls=CompetingCell,
+        )
+        layer.apply_raster(np.ones((1, 4, 4)) * cfg.sitegroup.max_size, "lim_h")
+        return model
+
+    def test_growth(self, model: SizedModel):
+        """测试普通增长与主体自身的增长结果一致"""
+        # Arrange
+        hunter = model.agents.create(Hunter, size=10, singleton=True)
+        hunter.put_on(model.nature.layer.array_cells[1][1])
+        hunter.params.growth_rate = 0.1
+
+        # Act
+        model.population_growth()
+
+        # Assert：与 `test_hunters.test_population_growth` 的标量结果相同
+        assert hunter.size == 11
+        assert model.alive_sizes("Hunter").sum() == 11
+
+    def test_growth_below_min_dies(self, model: SizedModel):
+        """测试增长后人数低于最小值的主体会死去"""
+        # Arrange
+        hunter = model.agents.create(Hunter, size=10, singleton=True)
+        hunter.put_on(model.nature.layer.array_cells[1][1])
+        hunter.params.growth_rate = -0.9  # 10 -> 1，低于最小值 6
+
+        # Act
+        model.population_growth()
+
+        # Assert
+        assert not hunter.on_earth
+        assert len(model.hunters) == 0
+        assert model.alive_sizes("Hunter").size == 0
+
+    def test_growth_above_max_complicates(self, model: SizedModel):
+        """测试增长后超过上限的农民走 setter 逻辑：封顶并复杂化"""
+        # Arrange
+        farmer = model.agents.create(Farmer, size=3000, singleton=True)
+        farmer.put_on(model.nature.layer.array_cells[2][2])
+        farmer.params.growth_rate = 0.1  # 3000 -> 3300，超过上限 3142
+        max_size = farmer.max_size
+        area = farmer.area
+
+        # Act
+        model.population_growth()
+
+        # Assert：人数被封顶，并且触发了复杂化（耕地增加、增长率下降）
+        assert farmer.size == max_size == 3142
+        assert farmer.area > area
+        assert farmer.growth_rate < 0.1
+
+    def test_no_growth_off_earth(self, model: SizedModel):
+        """测试不在地图上的主体不参与增长"""
+        # Arrange
+        hunter = model.agents.create(Hunter, size=10, singleton=True)
+        hunter.params.growth_rate = 0.1
+
+        # Act
+        model.population_growth()
+
+        # Assert
+        assert hunter.size == 10